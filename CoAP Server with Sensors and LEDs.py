@@ -1,11 +1,16 @@
 from machine import Pin, ADC
 import network
 import utime
+from custom_time import timestamp_buffer, format_time_into
 import microcoapy
 from coap_macros import COAP_METHOD
 from hcsr04 import HCSR04
 from dht import DHT22
-import json
+import ujson as json
+from micropython import const
+
+# 1 = print per-request debug output
+DEBUG = const(0)
 
 # Pins
 DHT_PIN = 21
@@ -17,6 +22,9 @@ TRIG_PIN = 32
 ECHO_PIN = 33
 MAX_BIN_HEIGHT = 100
 
+# DHT22 needs ~2 s between measurements and measure() blocks while reading
+DHT_MIN_INTERVAL_MS = 2000
+
 # Initialize sensors and pins
 dht_sensor = DHT22(Pin(DHT_PIN))
 light_sensor = ADC(Pin(LIGHT_SENSOR_PIN))
@@ -26,8 +34,19 @@ led1 = Pin(LED1_PIN, Pin.OUT)
 led2 = Pin(LED2_PIN, Pin.OUT)
 led3 = Pin(LED3_PIN, Pin.OUT)
 
+# LED number (1-based) -> pin and state key
+LEDS = (led1, led2, led3)
+LED_KEYS = ('led1', 'led2', 'led3')
+
 ultrasonic_sensor = HCSR04(trigger_pin=TRIG_PIN, echo_pin=ECHO_PIN)
 
+# Sensor response keys never change, so the JSON is built from a fixed template
+_SENSOR_JSON = ('{"timestamp": "%s", "temperature": %s, "humidity": %s, '
+                '"lightLevel": %d, "binLevel": %s}')
+
+# Reused for every timestamp instead of formatting a new string
+_ts_buf = timestamp_buffer()
+
 # Global variables
 led_states = {
     "led1": False,
@@ -35,6 +54,15 @@ led_states = {
     "led3": False
 }
 
+# Encoded led_states, refreshed only when a PUT changes them
+_led_json_cache = json.dumps(led_states)
+
+# Time of the last DHT measurement, None until the first one
+_last_meas_ms = None
+
+# Time of the last CoAP request, drives the adaptive poll interval
+last_req_ms = None
+
 def connect_wifi(ssid, password):
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
@@ -46,53 +74,57 @@ def connect_wifi(ssid, password):
     print('Network config:', wlan.ifconfig())
     return wlan
 
+# Returns the fill level in hundredths of a percent (integer), or None
 def get_distance():
     try:
         distance = ultrasonic_sensor.distance_cm()
         if distance is not None and distance <= MAX_BIN_HEIGHT:
-            fill_percentage = ((MAX_BIN_HEIGHT - distance) / MAX_BIN_HEIGHT) * 100
-            return round(fill_percentage, 2)
+            return int((MAX_BIN_HEIGHT - distance) * 10000) // MAX_BIN_HEIGHT
         return None
     except OSError as e:
         print("Ultrasonic sensor error:", str(e))
         return None
 
 def get_sensor_data():
+    global _last_meas_ms
     try:
-        dht_sensor.measure()
+        # Reuse the previous DHT reading if it is still fresh
+        now = utime.ticks_ms()
+        if _last_meas_ms is None or utime.ticks_diff(now, _last_meas_ms) >= DHT_MIN_INTERVAL_MS:
+            dht_sensor.measure()
+            _last_meas_ms = now
         temperature = dht_sensor.temperature()
         humidity = dht_sensor.humidity()
         light_level = light_sensor.read()
         bin_level = get_distance()
 
-        current_time = utime.localtime()
-        timestamp = "{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(
-            current_time[0], current_time[1], current_time[2],
-            current_time[3], current_time[4], current_time[5]
-        )
+        timestamp = format_time_into(_ts_buf, utime.localtime()).decode()
 
-        return {
-            "timestamp": timestamp,
-            "temperature": temperature,
-            "humidity": humidity,
-            "lightLevel": light_level,
-            "binLevel": bin_level
-        }
+        return _SENSOR_JSON % (
+            timestamp,
+            temperature,
+            humidity,
+            light_level,
+            'null' if bin_level is None else '%d.%02d' % divmod(bin_level, 100)
+        )
     except Exception as e:
         print("Error reading sensors:", str(e))
         return None
 
 def setup_server():
     server = microcoapy.Coap()
+    server.debug = DEBUG
     
     # Handler for sensor data requests
     def sensor_handler(packet, sender_ip, sender_port):
-        print(f'Sensor endpoint accessed from: {sender_ip}:{sender_port}')
+        global last_req_ms
+        last_req_ms = utime.ticks_ms()
+        if DEBUG:
+            print('Sensor endpoint accessed from: %s:%d' % (sender_ip, sender_port))
         
         if packet.method == COAP_METHOD.COAP_GET:
-            sensor_data = get_sensor_data()
-            if sensor_data:
-                response = json.dumps(sensor_data)
+            response = get_sensor_data()
+            if response:
                 server.sendResponse(
                     sender_ip, 
                     sender_port, 
@@ -100,23 +132,25 @@ def setup_server():
                     response,
                     0x45,  # 2.05 Content
                     0,     # No specific content format
-                    packet.token
+                    packet.token,
+                    DHT_MIN_INTERVAL_MS // 1000  # Max-Age: readings are reused this long
                 )
     
     # Handler for LED control
     def led_handler(packet, sender_ip, sender_port):
-        global led_states
-        print(f'LED endpoint accessed from: {sender_ip}:{sender_port}')
+        global led_states, _led_json_cache, last_req_ms
+        last_req_ms = utime.ticks_ms()
+        if DEBUG:
+            print('LED endpoint accessed from: %s:%d' % (sender_ip, sender_port))
 
 
         
         if packet.method == COAP_METHOD.COAP_GET:
-            response = json.dumps(led_states)
             server.sendResponse(
                 sender_ip, 
                 sender_port, 
                 packet.messageid,
-                response,
+                _led_json_cache,
                 0x45,  # 2.05 Content
                 0,     # No specific content format
                 packet.token
@@ -125,26 +159,25 @@ def setup_server():
         if packet.method == COAP_METHOD.COAP_PUT:
             try:
                 # Print the raw payload for debugging
-                print("Received payload:", packet.payload)
+                if DEBUG:
+                    print("Received payload:", packet.payload)
                 
-                # Handle simple format like "led:2,state:1"
-                payload_str = packet.payload.decode('utf-8').strip()
-                if ',' in payload_str:
-                    led_part, state_part = payload_str.split(',')
-                    led_num = int(led_part.split(':')[1])
-                    state = int(state_part.split(':')[1])
+                # Handle simple format like "led:2,state:1" by indexing the
+                # raw bytes; both values are single ASCII digits
+                payload = packet.payload
+                if payload[:4] == b'led:' and payload[5] == 44:  # ','
+                    led_num = payload[4] - 48
+                    state = payload[payload.index(b':', 5) + 1] - 48
+                    if not (0 <= led_num <= 9 and 0 <= state <= 9):
+                        raise ValueError("Invalid payload format")
                     
-                    print(f"Parsed values - LED: {led_num}, State: {state}")
+                    if DEBUG:
+                        print("Parsed values - LED: %d, State: %d" % (led_num, state))
                     
-                    if led_num == 1:
-                        led1.value(state)
-                        led_states['led1'] = bool(state)
-                    elif led_num == 2:
-                        led2.value(state)
-                        led_states['led2'] = bool(state)
-                    elif led_num == 3:
-                        led3.value(state)
-                        led_states['led3'] = bool(state)
+                    if 1 <= led_num <= 3:
+                        LEDS[led_num - 1].value(state)
+                        led_states[LED_KEYS[led_num - 1]] = bool(state)
+                        _led_json_cache = json.dumps(led_states)
                     
                     server.sendResponse(
                         sender_ip,
@@ -173,8 +206,24 @@ def setup_server():
     # Register endpoints
     server.addIncomingRequestCallback('sensors', sensor_handler)
     server.addIncomingRequestCallback('led', led_handler)
+
+    # Warm up the JSON encoder/decoder so the first request doesn't pay the init cost
+    json.dumps(None)
+    json.loads('{}')
     return server
 
+# Adaptive duty cycling: poll briskly right after a request and back off
+# the longer the server stays idle. Returns (timeout, poll period) in ms.
+def poll_interval_ms():
+    if last_req_ms is None:
+        return 10000, 500
+    dt = utime.ticks_diff(utime.ticks_ms(), last_req_ms)
+    if dt < 5000:
+        return 100, 10
+    if dt < 30000:
+        return 1000, 100
+    return 10000, 500
+
 def run_server():
     # Connect to WiFi
     connect_wifi('Galaxy A06 0a23', '12345678')
@@ -186,7 +235,8 @@ def run_server():
     
     while True:
         try:
-            server.poll(10000)
+            timeout, period = poll_interval_ms()
+            server.poll(timeout, period)
         except Exception as e:
             print("Error in main loop:", str(e))
             utime.sleep_ms(100)
@@ -0,0 +1,32 @@
+# Pin Definitions
+class PinConfig:
+    DHT_PIN = 21
+    LIGHT_SENSOR_PIN = 34
+    LED1_PIN = 13  # Red
+    LED2_PIN = 12  # Yellow
+    LED3_PIN = 27  # Green
+    TRIG_PIN = 32
+    ECHO_PIN = 33
+
+# ESP32 GPIO_OUT write-1-to-set / write-1-to-clear registers (GPIO 0-31 only)
+class GPIOConfig:
+    GPIO_OUT_W1TS_REG = 0x3FF44008
+    GPIO_OUT_W1TC_REG = 0x3FF4400C
+
+# Sensor Sampling
+class SensorConfig:
+    MAX_BIN_HEIGHT = 100  # cm
+    ECHO_WAIT_MS = 30  # Longest HC-SR04 echo (~5 m round trip)
+    DHT_MIN_INTERVAL_MS = 2000  # DHT22 needs ~2 s between measurements
+    SAMPLE_WINDOW = 16  # Samples aggregated per sensor response
+
+# Network Configuration
+class NetworkConfig:
+    WIFI_SSID = 'Galaxy A06 0a23'
+    WIFI_PASSWORD = '12345678'
+    SPRING_SERVER_IP = "192.168.4.113"
+    SPRING_SERVER_PORT = 5683
+    LED_STATUS_RESOURCE = "led-status"
+    LED_STATUS_MAX_AGE_MS = 60000  # CoAP default Max-Age (60 s)
+    RETRY_BACKOFF_MAX_S = 60  # Cap for the LED client's exponential back-off
+    WIFI_POLL_MAX_MS = 800  # Cap for the WiFi connect poll interval
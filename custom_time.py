@@ -1,8 +1,39 @@
 import utime
 
+# %-formatting is cheaper than str.format on MicroPython
+_TIMESTAMP_FORMAT = "%04d-%02d-%02d %02d:%02d:%02d"
+
+def format_time(t):
+    return _TIMESTAMP_FORMAT % (t[0], t[1], t[2], t[3], t[4], t[5])
+
+# (offset, width) of each field in a "YYYY-MM-DD HH:MM:SS" buffer
+_TIMESTAMP_FIELDS = ((0, 4), (5, 2), (8, 2), (11, 2), (14, 2), (17, 2))
+
+def timestamp_buffer():
+    return bytearray(b"0000-00-00 00:00:00")
+
+# Write t into a buffer from timestamp_buffer() in place, digit by digit,
+# so no format tuple or intermediate strings are allocated
+def format_time_into(buf, t):
+    for i in range(6):
+        offset, width = _TIMESTAMP_FIELDS[i]
+        value = t[i]
+        pos = offset + width - 1
+        while pos >= offset:
+            buf[pos] = 48 + value % 10  # ASCII '0' + digit
+            value //= 10
+            pos -= 1
+    return buf
+
 def time():
     return utime.time()
 
+# Seconds from 1970-01-01 to the port's epoch (2000-01-01 on many ports)
+_UNIX_EPOCH_OFFSET = 946684800 if utime.gmtime(0)[0] == 2000 else 0
+
+def unix_time():
+    return utime.time() + _UNIX_EPOCH_OFFSET
+
 def localtime(secs=None):
     if secs is None:
         secs = time()
@@ -16,9 +47,7 @@ def gmtime(secs=None):
 def strftime(format, t=None):
     if t is None:
         t = localtime()
-    return "{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(
-        t[0], t[1], t[2], t[3], t[4], t[5]
-    )
+    return format_time(t)
 
 def sleep(seconds):
     utime.sleep(seconds)
\ No newline at end of file
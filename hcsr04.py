@@ -5,17 +5,47 @@ class HCSR04:
     def __init__(self, trigger_pin, echo_pin):
         self.trigger = Pin(trigger_pin, Pin.OUT)
         self.echo = Pin(echo_pin, Pin.IN)
-    
-    def distance_cm(self):
+
+        # Echo pulse is timed by an IRQ instead of blocking in time_pulse_us
+        self._rise_us = 0
+        self._pulse_us = None
+        self.echo.irq(trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING, handler=self._echo_irq, hard=True)
+
+    def _echo_irq(self, pin):
+        # Interrupt context: timestamp only, no allocation
+        now = utime.ticks_us()
+        if pin.value():
+            self._rise_us = now
+        else:
+            self._pulse_us = utime.ticks_diff(now, self._rise_us)
+
+    def ping(self):
+        self._pulse_us = None
         self.trigger.value(0)
         utime.sleep_us(2)
         self.trigger.value(1)
         utime.sleep_us(10)
         self.trigger.value(0)
+
+    def last_distance_cm(self):
+        # Distance from the echo of the last ping, None if no echo arrived
+        duration = self._pulse_us
+        if duration is None:
+            return None
+
+        # Calculate distance
+        distance = (duration / 2) / 29.1
+        return distance
+
+    def distance_cm(self):
+        # Blocking measurement (up to 30 ms); ping() + last_distance_cm() avoid the wait
+        self.ping()
         
         # Wait for pulse and measure duration
         duration = time_pulse_us(self.echo, 1, 30000)
+        if duration < 0:
+            return None
         
         # Calculate distance 
         distance = (duration / 2) / 29.1
-        return distance
\ No newline at end of file
+        return distance
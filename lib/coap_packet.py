@@ -10,6 +10,7 @@ class CoapPacket:
         self.payload = bytearray()
         self.messageid = 0
         self.content_format = macros.COAP_CONTENT_FORMAT.COAP_NONE
+        self.max_age = None
         self.query = bytearray()  # uint8_t*
         self.options = []
 
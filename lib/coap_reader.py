@@ -78,6 +78,12 @@ def parsePacketOptionsAndPayload(buffer, packet):
             if status is False:
                 return False
 
+        for opt in packet.options:
+            if opt.number == macros.COAP_OPTION_NUMBER.COAP_CONTENT_FORMAT:
+                packet.content_format = 0
+                for b in opt.buffer:
+                    packet.content_format = (packet.content_format << 8) | b
+
         if ((bufferIndex + 1) < bufferLen) and (buffer[bufferIndex] == 0xFF):
             packet.payload = buffer[bufferIndex+1:]  # does this works?
         else:
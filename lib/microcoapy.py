@@ -26,6 +26,7 @@ class Coap:
         self.sock = None
         self.callbacks = {}
         self.responseCallback = None
+        self.observeToken = None
         self.port = 0
         self.isServer = False
         self.state = self.TRANSMISSION_STATE.STATE_IDLE
@@ -77,6 +78,12 @@ class Coap:
             optionBuffer[1] = (coapPacket.content_format & 0x00FF)
             coapPacket.addOption(macros.COAP_OPTION_NUMBER.COAP_CONTENT_FORMAT, optionBuffer)
 
+        if coapPacket.max_age is not None:
+            optionBuffer = bytearray(2)
+            optionBuffer[0] = (coapPacket.max_age & 0xFF00) >> 8
+            optionBuffer[1] = (coapPacket.max_age & 0x00FF)
+            coapPacket.addOption(macros.COAP_OPTION_NUMBER.COAP_MAX_AGE, optionBuffer)
+
         if (coapPacket.query is not None) and (len(coapPacket.query) > 0):
             coapPacket.addOption(macros.COAP_OPTION_NUMBER.COAP_URI_QUERY, coapPacket.query)
 
@@ -100,7 +107,8 @@ class Coap:
             if status > 0:
                 status = coapPacket.messageid
 
-            self.log('Packet sent. messageid: ' + str(status))
+            if self.debug:
+                self.log('Packet sent. messageid: ' + str(status))
         except Exception as e:
             status = 0
             print('Exception while sending packet...')
@@ -132,7 +140,7 @@ class Coap:
         return self.sendPacket(ip, port, packet)
 
     # to be tested
-    def sendResponse(self, ip, port, messageid, payload, method, content_format, token):
+    def sendResponse(self, ip, port, messageid, payload, method, content_format, token, max_age=None):
         packet = CoapPacket()
 
         packet.type = macros.COAP_TYPE.COAP_ACK
@@ -141,6 +149,7 @@ class Coap:
         packet.payload = payload
         packet.messageid = messageid
         packet.content_format = content_format
+        packet.max_age = max_age
 
         return self.sendPacket(ip, port, packet)
 
@@ -154,6 +163,57 @@ class Coap:
     def post(self, ip, port, url, payload=bytearray(), query_option=None, content_format=macros.COAP_CONTENT_FORMAT.COAP_NONE, token=bytearray()):
         return self.send(ip, port, url, macros.COAP_TYPE.COAP_CON, macros.COAP_METHOD.COAP_POST, token, payload, content_format, query_option)
 
+    # Confirmable GET with the Observe option (rfc7641) set to register.
+    # Notifications are delivered to responseCallback like any other response.
+    def observe(self, ip, port, url, token=None, accept=None):
+        if token is None:
+            token = bytearray(uos.urandom(2))
+        # Kept so responseCallback can tell our notifications from other traffic
+        self.observeToken = token
+
+        packet = CoapPacket()
+        packet.type = macros.COAP_TYPE.COAP_CON
+        packet.method = macros.COAP_METHOD.COAP_GET
+        packet.token = token
+        packet.payload = None
+        packet.query = None
+
+        self.state = self.TRANSMISSION_STATE.STATE_IDLE
+        randBytes = uos.urandom(2)
+        packet.messageid = (randBytes[0] << 8) | randBytes[1]
+        # Options must be added in ascending order: Uri-Host(3), Observe(6), Uri-Path(11), Accept(17)
+        packet.setUriHost(ip)
+        packet.addOption(macros.COAP_OPTION_NUMBER.COAP_OBSERVE, bytearray(1))  # 0 = register
+        packet.setUriPath(url)
+
+        if accept is not None:
+            optionBuffer = bytearray(2)
+            optionBuffer[0] = (accept & 0xFF00) >> 8
+            optionBuffer[1] = (accept & 0x00FF)
+            packet.addOption(macros.COAP_OPTION_NUMBER.COAP_ACCEPT, optionBuffer)
+
+        return self.sendPacket(ip, port, packet)
+
+    # An Observe notification whose token isn't the current observation's
+    def isStaleNotification(self, packet):
+        if self.observeToken is None or packet.token == self.observeToken:
+            return False
+        for opt in packet.options:
+            if opt.number == macros.COAP_OPTION_NUMBER.COAP_OBSERVE:
+                return True
+        return False
+
+    # Reset (rfc7252 #4.2): reject a message we can't or won't process
+    def sendReset(self, ip, port, messageid):
+        packet = CoapPacket()
+        packet.type = macros.COAP_TYPE.COAP_RESET
+        packet.method = macros.COAP_METHOD.COAP_EMPTY_MESSAGE
+        packet.token = None
+        packet.payload = None
+        packet.messageid = messageid
+
+        return self.sendPacket(ip, port, packet)
+
     #non Confirmable
     def getNonConf(self, ip, port, url, token=bytearray()):
         return self.send(ip, port, url, macros.COAP_TYPE.COAP_NONCON, macros.COAP_METHOD.COAP_GET, token, None, macros.COAP_CONTENT_FORMAT.COAP_NONE, None)
@@ -177,8 +237,11 @@ class Coap:
             urlCallback = self.callbacks.get(url)
 
         if urlCallback is None:
-            if self.responseCallback:
-                # The incoming request may be a response, let the responseCallback handle it.
+            # Requests have code class 0 (and a non-empty code)
+            isRequest = requestPacket.method != macros.COAP_METHOD.COAP_EMPTY_MESSAGE and\
+                (requestPacket.method >> 5) == 0
+            if self.responseCallback and not isRequest:
+                # The incoming message is a response, let the responseCallback handle it.
                 return False
             print('Callback for url [', url, "] not found")
             self.sendResponse(sourceIp, sourcePort, requestPacket.messageid,
@@ -225,7 +288,8 @@ class Coap:
 
             packet = CoapPacket()
 
-            self.log("Incoming Packet bytes: " + str(binascii.hexlify(bytearray(buffer))))
+            if self.debug:
+                self.log("Incoming Packet bytes: " + str(binascii.hexlify(bytearray(buffer))))
 
             parsePacketHeaderInfo(buffer, packet)
 
@@ -258,6 +322,17 @@ class Coap:
                         self.sendResponse(remoteAddress[0], remoteAddress[1], packet.messageid,
                                         None, macros.COAP_TYPE.COAP_ACK,
                                         macros.COAP_CONTENT_FORMAT.COAP_NONE, packet.token)
+                    elif packet.type == macros.COAP_TYPE.COAP_CON:
+                        if self.isStaleNotification(packet):
+                            # Reject notifications for an observation we no longer
+                            # hold, so the server drops it (rfc7641 #3.6)
+                            self.sendReset(remoteAddress[0], remoteAddress[1], packet.messageid)
+                            return True
+                        # Confirmable notifications (e.g. Observe) must be acknowledged,
+                        # otherwise the server cancels the observation
+                        self.sendResponse(remoteAddress[0], remoteAddress[1], packet.messageid,
+                                        None, macros.COAP_METHOD.COAP_EMPTY_MESSAGE,
+                                        macros.COAP_CONTENT_FORMAT.COAP_NONE, None)
                     if self.responseCallback is not None:
                         self.responseCallback(packet, remoteAddress)
             return True
@@ -1,33 +1,22 @@
-from machine import Pin, ADC
+from machine import Pin, ADC, mem32
 import network
 import utime
+from custom_time import unix_time
 import microcoapy
-from coap_macros import COAP_METHOD
+from coap_macros import COAP_METHOD, COAP_CONTENT_FORMAT
 from hcsr04 import HCSR04
 from dht import DHT22
-import json
-import binascii
+from array import array
+import ujson as json
+import micropython
+from micropython import const
 import uasyncio as asyncio
+import urandom
 import cbor
+from config import PinConfig, GPIOConfig, SensorConfig, NetworkConfig
 
-# Pin Definitions
-class PinConfig:
-    DHT_PIN = 21
-    LIGHT_SENSOR_PIN = 34
-    LED1_PIN = 13  # Red
-    LED2_PIN = 12  # Yellow
-    LED3_PIN = 27  # Green
-    TRIG_PIN = 32
-    ECHO_PIN = 33
-    MAX_BIN_HEIGHT = 100  # cm
-
-# Network Configuration
-class NetworkConfig:
-    WIFI_SSID = 'Galaxy A06 0a23'
-    WIFI_PASSWORD = '12345678'
-    SPRING_SERVER_IP = "192.168.4.113"
-    SPRING_SERVER_PORT = 5683
-    LED_STATUS_RESOURCE = "led-status"
+# Per-request debug output; const() lets the compiler drop the disabled branches
+DEBUG = const(0)
 
 # Sensor and LED Management
 class SensorManager:
@@ -39,64 +28,175 @@ class SensorManager:
         self.ultrasonic_sensor = HCSR04(trigger_pin=PinConfig.TRIG_PIN, 
                                       echo_pin=PinConfig.ECHO_PIN)
         
-        # Initialize LEDs
-        self.led1 = Pin(PinConfig.LED1_PIN, Pin.OUT)
-        self.led2 = Pin(PinConfig.LED2_PIN, Pin.OUT)
-        self.led3 = Pin(PinConfig.LED3_PIN, Pin.OUT)
+        # Initialize LEDs as outputs; they are driven through the GPIO registers
+        Pin(PinConfig.LED1_PIN, Pin.OUT)
+        Pin(PinConfig.LED2_PIN, Pin.OUT)
+        Pin(PinConfig.LED3_PIN, Pin.OUT)
         
-        # LED states
-        self.led_states = {
-            "redLed": False,
-            "yellowLed": False,
-            "greenLed": False
+        # LED states as a GPIO bitmask; W1TS/W1TC only cover GPIO 0-31
+        assert max(PinConfig.LED1_PIN, PinConfig.LED2_PIN, PinConfig.LED3_PIN) < 32, \
+            "LED pins must be below GPIO 32"
+        self._mask_red = 1 << PinConfig.LED1_PIN
+        self._mask_yellow = 1 << PinConfig.LED2_PIN
+        self._mask_green = 1 << PinConfig.LED3_PIN
+        self._mask_all = self._mask_red | self._mask_yellow | self._mask_green
+        self.led_bits = 0
+
+        # Time of the last DHT measurement, None until the first one
+        self._last_meas_ms = None
+
+        # Rolling window of samples taken by sample_task()
+        self._temperature = array('f', [0] * SensorConfig.SAMPLE_WINDOW)
+        self._humidity = array('f', [0] * SensorConfig.SAMPLE_WINDOW)
+        self._light_level = array('f', [0] * SensorConfig.SAMPLE_WINDOW)
+        self._sample_times = array('I', [0] * SensorConfig.SAMPLE_WINDOW)
+        self._bin_levels = array('b', [0] * SensorConfig.SAMPLE_WINDOW)  # -1 = no reading
+        self._sample_index = 0
+        self._sample_count = 0
+        self._unread_count = 0  # Samples not yet delivered in a batch
+        self._sample_time = None
+        self._bin_level = None
+
+        # CBOR encoding of get_sensor_data(), rebuilt after each new sample
+        self._cache_payload = None
+
+        # Filled in place by get_sensor_data(); callers must encode it before the next call
+        self._reading = {
+            "timestamp": 0,
+            "temperature": 0.0,
+            "temperatureRange": [0.0, 0.0],
+            "humidity": 0.0,
+            "humidityRange": [0.0, 0.0],
+            "lightLevel": 0.0,
+            "lightLevelRange": [0.0, 0.0],
+            "binLevel": None,
+            "samples": 0,
+            "batch": None
         }
 
+    @micropython.native
     def update_led_states(self, new_states):
         """Update LED states and physical LED outputs"""
-        self.led_states = new_states
-        self.led1.value(new_states["redLed"])
-        self.led2.value(new_states["yellowLed"])
-        self.led3.value(new_states["greenLed"])
+        bits = ((self._mask_red if new_states["redLed"] else 0) |
+                (self._mask_yellow if new_states["yellowLed"] else 0) |
+                (self._mask_green if new_states["greenLed"] else 0))
+        self.led_bits = bits
+        # Switch all LEDs at once: set the lit ones, clear the rest
+        mem32[GPIOConfig.GPIO_OUT_W1TS_REG] = bits
+        mem32[GPIOConfig.GPIO_OUT_W1TC_REG] = self._mask_all & ~bits
 
+    @micropython.native
     def get_distance(self):
-        """Get distance measurement and calculate fill percentage"""
+        """Get distance measurement and calculate fill percentage (integer)"""
         try:
-            distance = self.ultrasonic_sensor.distance_cm()
-            if distance is not None and distance <= PinConfig.MAX_BIN_HEIGHT:
-                fill_percentage = ((PinConfig.MAX_BIN_HEIGHT - distance) / 
-                                 PinConfig.MAX_BIN_HEIGHT) * 100
-                return round(fill_percentage, 2)
-            return None
+            # Echo of the ping fired by sample_task()
+            distance = self.ultrasonic_sensor.last_distance_cm()
+            if distance is None or distance > SensorConfig.MAX_BIN_HEIGHT:
+                return None
+            return (SensorConfig.MAX_BIN_HEIGHT - int(distance)) * 100 // SensorConfig.MAX_BIN_HEIGHT
         except OSError as e:
             print("Ultrasonic sensor error:", str(e))
             return None
 
-    def get_sensor_data(self):
-        """Get data from all sensors"""
+    def sample(self):
+        """Read all sensors once into the rolling window"""
         try:
-            self.dht_sensor.measure()
-            temperature = self.dht_sensor.temperature()
-            humidity = self.dht_sensor.humidity()
-            light_level = self.light_sensor.read()
-            bin_level = self.get_distance()
-
-            current_time = utime.localtime()
-            timestamp = "{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(
-                current_time[0], current_time[1], current_time[2],
-                current_time[3], current_time[4], current_time[5]
-            )
+            # measure() blocks while reading; reuse the previous reading if it is still fresh
+            now = utime.ticks_ms()
+            if self._last_meas_ms is None or \
+                    utime.ticks_diff(now, self._last_meas_ms) >= SensorConfig.DHT_MIN_INTERVAL_MS:
+                self.dht_sensor.measure()
+                self._last_meas_ms = now
 
-            return {
-                "timestamp": timestamp,
-                "temperature": temperature,
-                "humidity": humidity,
-                "lightLevel": light_level,
-                "binLevel": bin_level
-            }
+            i = self._sample_index
+            self._temperature[i] = self.dht_sensor.temperature()
+            self._humidity[i] = self.dht_sensor.humidity()
+            self._light_level[i] = self.light_sensor.read()
+            self._bin_level = self.get_distance()
+            self._bin_levels[i] = -1 if self._bin_level is None else self._bin_level
+            self._sample_time = unix_time()
+            self._sample_times[i] = self._sample_time
+
+            self._sample_index = (i + 1) % SensorConfig.SAMPLE_WINDOW
+            if self._sample_count < SensorConfig.SAMPLE_WINDOW:
+                self._sample_count += 1
+            if self._unread_count < SensorConfig.SAMPLE_WINDOW:
+                self._unread_count += 1
+            self._cache_payload = None
         except Exception as e:
             print("Error reading sensors:", str(e))
+
+    async def sample_task(self):
+        """Sample the sensors in the background so requests never wait on sensor I/O"""
+        while True:
+            # Ping first; the IRQ times the echo while other tasks run
+            self.ultrasonic_sensor.ping()
+            await asyncio.sleep_ms(SensorConfig.ECHO_WAIT_MS)
+            self.sample()
+            await asyncio.sleep_ms(SensorConfig.DHT_MIN_INTERVAL_MS - SensorConfig.ECHO_WAIT_MS)
+
+    def _aggregate(self, window):
+        """Return (mean, min, max) over the filled part of a sample window"""
+        total = low = high = window[0]
+        for i in range(1, self._sample_count):
+            value = window[i]
+            total += value
+            if value < low:
+                low = value
+            elif value > high:
+                high = value
+        return total / self._sample_count, low, high
+
+    def _pending_batch(self):
+        """Return the samples not yet delivered, oldest first"""
+        count = self._unread_count
+        start = self._sample_index - count
+        batch = []
+        for k in range(count):
+            i = (start + k) % SensorConfig.SAMPLE_WINDOW
+            bin_level = self._bin_levels[i]
+            batch.append([
+                self._sample_times[i],
+                self._temperature[i],
+                self._humidity[i],
+                self._light_level[i],
+                None if bin_level < 0 else bin_level
+            ])
+        return batch
+
+    def get_sensor_payload_cbor(self):
+        """Get the CBOR-encoded sensor data, encoding at most once per sample"""
+        if self._cache_payload is None:
+            sensor_data = self.get_sensor_data()
+            if sensor_data is None:
+                return None
+            # Drained only when re-encoding, so repeats within a sample get the same batch
+            sensor_data["batch"] = self._pending_batch()
+            self._cache_payload = cbor.dumps(sensor_data)
+            # Only now are the batched samples delivered; a failed encode keeps them
+            self._unread_count = 0
+        return self._cache_payload
+
+    def get_sensor_data(self):
+        """Get sensor data aggregated over the current sample window"""
+        if self._sample_count == 0:
             return None
 
+        r = self._reading
+        r["timestamp"] = self._sample_time  # Unix epoch seconds
+        r["temperature"], low, high = self._aggregate(self._temperature)
+        r["temperatureRange"][0] = low
+        r["temperatureRange"][1] = high
+        r["humidity"], low, high = self._aggregate(self._humidity)
+        r["humidityRange"][0] = low
+        r["humidityRange"][1] = high
+        r["lightLevel"], low, high = self._aggregate(self._light_level)
+        r["lightLevelRange"][0] = low
+        r["lightLevelRange"][1] = high
+        r["binLevel"] = self._bin_level
+        r["samples"] = self._sample_count
+        return r
+
 # Network Manager
 class NetworkManager:
     @staticmethod
@@ -111,154 +211,218 @@ class NetworkManager:
             
             # Wait for connection with timeout
             start_time = utime.time()
+            delay_ms = 50
             while not wlan.isconnected():
                 if utime.time() - start_time > 20:  # 20 second timeout
                     raise Exception("WiFi connection timeout")
-                await asyncio.sleep_ms(100)
+                await asyncio.sleep_ms(delay_ms)
+                delay_ms = min(delay_ms * 2, NetworkConfig.WIFI_POLL_MAX_MS)
                 
         print('Network config:', wlan.ifconfig())
         return wlan
 
+# Suspend the calling task until a datagram is queued on sock, so other
+# tasks keep running instead of being starved by a poll/sleep loop
+async def wait_readable(sock):
+    yield asyncio.core._io_queue.queue_read(sock)
+
+# Keys every LED status notification must carry
+_LED_KEYS = ("redLed", "yellowLed", "greenLed")
+
 # CoAP Client for LED Status
 class LEDStatusClient:
-    def __init__(self, sensor_manager):
+    def __init__(self, sensor_manager, coap, request_reopen):
         self.sensor_manager = sensor_manager
+        # Shared with SensorServer, whose loop dispatches our responses
+        self.client = coap
+        # The socket belongs to SensorServer's receive loop; we only ask it to reopen
+        self.request_reopen = request_reopen
+        self.client.responseCallback = self.received_message_callback
+        # Set by the callback whenever a response or notification arrives
+        self.response_event = asyncio.Event()
+        # Set when a notification carries LED states for apply_task()
+        self._new_state_event = asyncio.Event()
+        self._new_led_states = None
 
-    async def fetch_led_status(self):
-        """Fetch LED status from Spring Boot server"""
-        client = microcoapy.Coap()
+    @micropython.native
+    def received_message_callback(self, packet, sender):
+        """Apply an LED status response or Observe notification"""
+        if DEBUG:
+            print("Message received from %s: %s" % (sender, packet.toString()))
+
+        # Only responses to our own observation (code class 2-5, our token)
+        if packet.method < 0x40 or packet.token != self.client.observeToken:
+            return
         
-        def received_message_callback(packet, sender):
-            print(f"Message received from {sender}: {packet.toString()}")
-            
-            if packet.method == 0x45:  # 2.05 Content
-                try:
-                    new_led_states = json.loads(packet.payload.decode('utf-8'))
+        if packet.method == 0x45:  # 2.05 Content
+            try:
+                # LED status is CBOR; JSON only if the server explicitly says so
+                if packet.content_format == COAP_CONTENT_FORMAT.COAP_APPLICATION_JSON:
+                    new_led_states = json.loads(packet.payload)  # ujson parses the raw bytes
+                else:
+                    new_led_states = cbor.loads(packet.payload)
+                if DEBUG:
                     print("Received LED status:", new_led_states)
-                    self.sensor_manager.update_led_states(new_led_states)
-                except Exception as e:
-                    print("Error parsing LED status:", str(e))
-            else:
-                print(f"Failed to fetch LED status: Response code {hex(packet.method)}")
+                if not isinstance(new_led_states, dict):
+                    raise ValueError("LED status is not a map")
+                for key in _LED_KEYS:
+                    if key not in new_led_states:
+                        raise ValueError("LED status missing " + key)
+                self._new_led_states = new_led_states
+                self._new_state_event.set()
+            except Exception as e:
+                print("Error parsing LED status:", str(e))
+        else:
+            if DEBUG:
+                print("Failed to fetch LED status: Response code 0x%02x" % packet.method)
+        self.response_event.set()
+
+    async def apply_task(self):
+        """Drive the LEDs as soon as a new state arrives"""
+        while True:
+            await self._new_state_event.wait()
+            self._new_state_event.clear()
+            try:
+                self.sensor_manager.update_led_states(self._new_led_states)
+            except Exception as e:
+                print("Error updating LEDs:", str(e))
+
+    async def fetch_led_status(self):
+        """Register as an observer of the LED status on the Spring Boot server"""
+        self.response_event.clear()
+        messageid = self.client.observe(
+            NetworkConfig.SPRING_SERVER_IP,
+            NetworkConfig.SPRING_SERVER_PORT,
+            NetworkConfig.LED_STATUS_RESOURCE,
+            # Reuse the token so re-registering replaces our relation (rfc7641 #3.3.1)
+            token=self.client.observeToken,
+            accept=COAP_CONTENT_FORMAT.COAP_APPLICATION_CBOR
+        )
+        if not messageid:
+            raise OSError("Failed to send LED status request")
 
         try:
-            client.start(port=0)
-            client.responseCallback = received_message_callback
-            
-            messageid = client.get(
-                NetworkConfig.SPRING_SERVER_IP,
-                NetworkConfig.SPRING_SERVER_PORT,
-                NetworkConfig.LED_STATUS_RESOURCE
-            )
-            
-            if isinstance(messageid, int):
-                start_time = utime.ticks_ms()
-                while utime.ticks_diff(utime.ticks_ms(), start_time) < 5000:  # 5s timeout
-                    client.poll(100)
-                    await asyncio.sleep_ms(100)
-            
-        except Exception as e:
-            print("Error fetching LED status:", str(e))
-        finally:
-            client.stop()
+            await asyncio.wait_for_ms(self.response_event.wait(), 5000)  # 5s timeout
+            return True
+        except asyncio.TimeoutError:
+            print("LED status request timed out")
+            return False
 
     async def run(self):
         """Main LED status client loop"""
+        backoff = 1
         while True:
             try:
-                await self.fetch_led_status()
-                await asyncio.sleep(5)  # 5 second delay between updates
+                if await self.fetch_led_status():
+                    backoff = 1
+                    # The server pushes every LED change; only re-register
+                    # if no notification arrived within Max-Age
+                    try:
+                        while True:
+                            self.response_event.clear()
+                            await asyncio.wait_for_ms(self.response_event.wait(),
+                                                      NetworkConfig.LED_STATUS_MAX_AGE_MS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+            except OSError as e:
+                print("LED client socket error:", str(e))
+                self.request_reopen()
             except Exception as e:
                 print("LED client error:", str(e))
-                await asyncio.sleep(5)  # Wait before retry
+
+            # Exponential back-off with jitter before retrying
+            await asyncio.sleep(backoff)
+            backoff = min(NetworkConfig.RETRY_BACKOFF_MAX_S, backoff * 2 + urandom.getrandbits(2))
+
+# Sensor response codes and content format, inlined by the compiler
+_CODE_2_05 = const(0x45)  # 2.05 Content
+_CODE_4_04 = const(0x84)  # 4.04 Not Found
+_CODE_4_05 = const(0x85)  # 4.05 Method Not Allowed
+_CODE_5_00 = const(0x50)  # 5.00 Internal Server Error
+_CF_CBOR = const(60)      # application/cbor
+_SENSOR_MAX_AGE = SensorConfig.DHT_MIN_INTERVAL_MS // 1000  # seconds
+_EMPTY = b''
 
 # CoAP Server that responds to sensor requests using CBOR
 class SensorServer:
-    def __init__(self, sensor_manager):
+    MAX_REQUESTS_PER_WAKE = 8
+    IDLE_WAKE_MS = 1000  # Longest a pending socket reopen waits without traffic
+
+    def __init__(self, sensor_manager, coap):
         self.sensor_manager = sensor_manager
-        self.server = microcoapy.Coap()
+        # Shared with LEDStatusClient; this server runs the only receive loop
+        self.server = coap
+        self._reopen_needed = False
+
+    def request_reopen(self):
+        """Ask run() to replace the shared socket, e.g. after the WLAN dropped"""
+        self._reopen_needed = True
+
+    def _reopen(self):
+        """Replace the shared socket (bound to the CoAP port); retried on failure"""
+        self._reopen_needed = False
+        try:
+            self.server.stop()
+            self.server.start()
+        except Exception as e:
+            print("Error reopening the CoAP socket:", e)
+            self._reopen_needed = True
 
     def setup(self):
         """Setup the CoAP server and register the 'sensors' endpoint."""
+        # Bind hot-path lookups once so each request avoids attribute lookups.
+        send = self.server.sendResponse
+        get_payload = self.sensor_manager.get_sensor_payload_cbor
+        GET = COAP_METHOD.COAP_GET
+
+        def send_error(packet, sender_ip, sender_port, code):
+            send(sender_ip, sender_port, packet.messageid, _EMPTY, code, _CF_CBOR, packet.token)
+
+        def handle_get(packet, sender_ip, sender_port):
+            # CBOR-encoded sensor data, cached until the next sample.
+            response_payload = get_payload()
+            if response_payload is None:
+                if DEBUG:
+                    print("No sensor data available.")
+                # If sensor data is missing, send a 4.04 Not Found error.
+                send_error(packet, sender_ip, sender_port, _CODE_4_04)
+                return
+            # Send a successful response (2.05 Content) with the CBOR-encoded data.
+            send(
+                sender_ip,
+                sender_port,
+                packet.messageid,
+                response_payload,
+                _CODE_2_05,
+                _CF_CBOR,
+                packet.token,
+                _SENSOR_MAX_AGE  # Max-Age: readings are reused this long
+            )
+
+        def handle_other(packet, sender_ip, sender_port):
+            if DEBUG:
+                print("Unsupported CoAP method received:", packet.method)
+            # If the method is not GET, send a 4.05 Method Not Allowed error.
+            send_error(packet, sender_ip, sender_port, _CODE_4_05)
+
+        @micropython.native
         def sensor_handler(packet, sender_ip, sender_port):
+            if DEBUG:
+                print("Sensor endpoint accessed from: %s:%d" % (sender_ip, sender_port))
             try:
-                print(f"Sensor endpoint accessed from: {sender_ip}:{sender_port}")
-
-                # Check if the request is a GET request.
-                if packet.method == COAP_METHOD.COAP_GET:
-                    sensor_data = self.sensor_manager.get_sensor_data()
-                    if sensor_data is not None:
-                        try:
-                            # Serialize sensor data using the single-file CBOR implementation.
-                            response_payload = cbor.dumps(sensor_data)
-                        except Exception as e:
-                            print("Error serializing sensor data to CBOR:", e)
-                            # If serialization fails, send a 5.00 Internal Server Error response.
-                            self.server.sendResponse(
-                                sender_ip,
-                                sender_port,
-                                packet.messageid,
-                                b'',
-                                0x50,  # 5.00 Internal Server Error
-                                60,    # Content format: application/cbor (code 60)
-                                packet.token
-                            )
-                            return
-
-                        # Send a successful response (2.05 Content) with the CBOR-encoded data.
-                        self.server.sendResponse(
-                            sender_ip,
-                            sender_port,
-                            packet.messageid,
-                            response_payload,
-                            0x45,  # 2.05 Content
-                            60,    # Content format: application/cbor
-                            packet.token
-                        )
-                    else:
-                        print("No sensor data available.")
-                        # If sensor data is missing, send a 4.04 Not Found error.
-                        self.server.sendResponse(
-                            sender_ip,
-                            sender_port,
-                            packet.messageid,
-                            b'',
-                            0x84,  # 4.04 Not Found
-                            60,
-                            packet.token
-                        )
-                else:
-                    print("Unsupported CoAP method received:", packet.method)
-                    # If the method is not GET, send a 4.05 Method Not Allowed error.
-                    self.server.sendResponse(
-                        sender_ip,
-                        sender_port,
-                        packet.messageid,
-                        b'',
-                        0x85,  # 4.05 Method Not Allowed
-                        60,
-                        packet.token
-                    )
+                (handle_get if packet.method == GET else handle_other)(packet, sender_ip, sender_port)
             except Exception as e:
                 print("Error handling sensor request:", e)
                 # In case of any error while handling the request, try to send a generic error response.
                 try:
-                    self.server.sendResponse(
-                        sender_ip,
-                        sender_port,
-                        packet.messageid,
-                        b'',
-                        0x50,  # 5.00 Internal Server Error
-                        60,
-                        packet.token
-                    )
+                    send_error(packet, sender_ip, sender_port, _CODE_5_00)
                 except Exception as inner_e:
                     print("Error sending error response:", inner_e)
 
-        # Register the 'sensors' endpoint and start the server.
+        # Register the 'sensors' endpoint; the socket is started by CoAPApplication.
         try:
             self.server.addIncomingRequestCallback("sensors", sensor_handler)
-            self.server.start()
             print("CoAP server started. Waiting for requests...")
         except Exception as e:
             print("Error setting up the CoAP server:", e)
@@ -268,10 +432,19 @@ class SensorServer:
         self.setup()
         while True:
             try:
-                # Poll for incoming requests with a 1-second timeout.
-                self.server.poll(1000)
-                # Briefly sleep to allow other tasks to run.
-                await asyncio.sleep_ms(100)
+                if self._reopen_needed:
+                    self._reopen()
+                # Sleep until a request arrives, letting other tasks run meanwhile.
+                try:
+                    await asyncio.wait_for_ms(wait_readable(self.server.sock), self.IDLE_WAKE_MS)
+                except asyncio.TimeoutError:
+                    continue
+                # Handle everything that queued up in one go (bounded so a burst
+                # can't starve the other tasks), then yield before blocking again.
+                for _ in range(self.MAX_REQUESTS_PER_WAKE):
+                    if not self.server.loop(False):
+                        break
+                await asyncio.sleep_ms(0)
             except Exception as e:
                 print("Server error:", e)
                 # On error, wait briefly before trying again to prevent a tight error loop.
@@ -280,21 +453,28 @@ class SensorServer:
 class CoAPApplication:
     def __init__(self):
         self.sensor_manager = SensorManager()
-        self.led_client = LEDStatusClient(self.sensor_manager)
-        self.sensor_server = SensorServer(self.sensor_manager)
+        # One CoAP endpoint and UDP socket for both the server and the LED client
+        self.coap = microcoapy.Coap()
+        self.coap.debug = DEBUG
+        self.sensor_server = SensorServer(self.sensor_manager, self.coap)
+        self.led_client = LEDStatusClient(self.sensor_manager, self.coap,
+                                          self.sensor_server.request_reopen)
 
     async def run(self):
         """Run the main application"""
         try:
             # Connect to WiFi
             await NetworkManager.connect_wifi()
+            self.coap.start()
             
             # Create tasks
+            sampler_task = asyncio.create_task(self.sensor_manager.sample_task())
             server_task = asyncio.create_task(self.sensor_server.run())
             client_task = asyncio.create_task(self.led_client.run())
+            led_task = asyncio.create_task(self.led_client.apply_task())
             
-            # Wait for both tasks
-            await asyncio.gather(server_task, client_task)
+            # Wait for all tasks
+            await asyncio.gather(sampler_task, server_task, client_task, led_task)
             
         except Exception as e:
             print("Application error:", str(e))
@@ -1,37 +1,53 @@
 from machine import Pin
 import network
-import time
 import microcoapy
 from coap_macros import COAP_METHOD
+import micropython
+from micropython import const
+import uasyncio as asyncio
+from config import PinConfig, NetworkConfig
+
+# 1 = print per-request debug output
+DEBUG = const(0)
 
 # LED setup
-led = Pin(13, Pin.OUT)
+led = Pin(PinConfig.LED1_PIN, Pin.OUT)
 led_status = False
 
+# The only two GET payloads, built once instead of per request
+_LED_TRUE = b"led:true"
+_LED_FALSE = b"led:false"
+
+# Accepted PUT payloads -> LED value
+_PUT_MAP = {b"true": 1, b"1": 1, b"false": 0, b"0": 0}
+
 # Network setup
-def connect_wifi(ssid, password):
+async def connect_wifi(ssid, password):
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
     if not wlan.isconnected():
         print('Connecting to network...')
         wlan.connect(ssid, password)
         while not wlan.isconnected():
-            pass
+            await asyncio.sleep_ms(200)  # Yield to the WiFi driver
     print('Network config:', wlan.ifconfig())
     return wlan
 
 # CoAP server setup
 def setup_server():
     server = microcoapy.Coap()
+    server.debug = DEBUG
     
     # LED state handler
+    @micropython.native
     def led_handler(packet, sender_ip, sender_port):
         global led_status
-        print(f'LED endpoint accessed from: {sender_ip}:{sender_port}')
+        if DEBUG:
+            print('LED endpoint accessed from: %s:%d' % (sender_ip, sender_port))
         
         if packet.method == COAP_METHOD.COAP_GET:
             # Return current LED state
-            response = "led:" + str(led_status).lower()
+            response = _LED_TRUE if led_status else _LED_FALSE
             try:
                 server.sendResponse(
                     sender_ip, 
@@ -42,28 +58,25 @@ def setup_server():
                     0,     # No specific content format
                     packet.token
                 )
-                print("GET response sent. LED status:", led_status)
+                if DEBUG:
+                    print("GET response sent. LED status:", led_status)
             except Exception as e:
                 print("Error sending GET response:", str(e))
             
         elif packet.method == COAP_METHOD.COAP_PUT:
             try:
                 # Parse payload
-                payload_str = packet.payload.decode('utf-8').strip()
-                print("Received payload:", payload_str)
+                if DEBUG:
+                    print("Received payload:", packet.payload)
                 
-                # More flexible payload parsing
-                payload_lower = payload_str.lower()
-                if "true" in payload_lower or "1" in payload_lower:
-                    led_status = True
-                    led.value(1)
-                elif "false" in payload_lower or "0" in payload_lower:
-                    led_status = False
-                    led.value(0)
-                else:
+                value = _PUT_MAP.get(packet.payload.strip().lower())
+                if value is None:
                     raise ValueError("Invalid payload format")
+                led_status = bool(value)
+                led.value(value)
                 
-                print("LED status updated to:", led_status)
+                if DEBUG:
+                    print("LED status updated to:", led_status)
                 
                 server.sendResponse(
                     sender_ip,
@@ -74,7 +87,8 @@ def setup_server():
                     0,     # No specific content format
                     packet.token
                 )
-                print("PUT response sent successfully")
+                if DEBUG:
+                    print("PUT response sent successfully")
                 
             except Exception as e:
                 print("Error handling PUT request:", str(e))
@@ -88,7 +102,8 @@ def setup_server():
                         0,     # No specific content format
                         packet.token
                     )
-                    print("Error response sent")
+                    if DEBUG:
+                        print("Error response sent")
                 except Exception as send_error:
                     print("Error sending error response:", str(send_error))
     
@@ -96,10 +111,14 @@ def setup_server():
     server.addIncomingRequestCallback('led', led_handler)
     return server
 
+# Same readiness wait as main.py
+async def wait_readable(sock):
+    yield asyncio.core._io_queue.queue_read(sock)
+
 # Main server execution
-def run_server():
+async def run_server():
     # Connect to WiFi
-    connect_wifi('Galaxy A06 0a23', '12345678')
+    await connect_wifi(NetworkConfig.WIFI_SSID, NetworkConfig.WIFI_PASSWORD)
     
     # Setup and start server
     server = setup_server()
@@ -108,24 +127,25 @@ def run_server():
     
     while True:
         try:
-            server.poll(10000)
+            await wait_readable(server.sock)
+            server.loop(False)
         except Exception as e:
             print("Error in main loop:", str(e))
             # Small delay before continuing
-            time.sleep_ms(100)
+            await asyncio.sleep_ms(100)
             continue
 
-def main():
+async def main():
     while True:
         try:
-            run_server()
-        except KeyboardInterrupt:
-            print("Server stopped by user")
-            break
+            await run_server()
         except Exception as e:
             print("Server error:", str(e))
             print("Restarting server in 5 seconds...")
-            time.sleep(5)
+            await asyncio.sleep(5)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Server stopped by user")
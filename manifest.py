@@ -0,0 +1,15 @@
+# Frozen-module manifest for building a custom MicroPython firmware.
+# Freezing keeps these modules' bytecode in flash instead of the heap:
+#   make BOARD=ESP32_GENERIC FROZEN_MANIFEST=/path/to/manifest.py
+include("$(PORT_DIR)/boards/manifest.py")
+
+module("cbor.py")
+module("custom_time.py")
+module("hcsr04.py")
+
+module("microcoapy.py", base_path="lib")
+module("coap_macros.py", base_path="lib")
+module("coap_option.py", base_path="lib")
+module("coap_packet.py", base_path="lib")
+module("coap_reader.py", base_path="lib")
+module("coap_writer.py", base_path="lib")